@@ -0,0 +1,52 @@
+# gateway_chat_model.py
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+
+
+class GatewaySyncCallError(RuntimeError):
+    """Raised when GatewayChatModel is called through LangChain's sync API."""
+
+
+def langchain_provider_call(chat_model: BaseChatModel):
+    """Adapts a LangChain chat model to the gateway's provider call signature."""
+    async def call(messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs) -> ChatResult:
+        result = await chat_model.agenerate([messages], stop=stop, **kwargs)
+        return ChatResult(generations=result.generations[0], llm_output=result.llm_output)
+    return call
+
+
+class GatewayChatModel(BaseChatModel):
+    """LangChain chat model that sends every generation through an LLMGateway."""
+
+    gateway: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm-gateway"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # The gateway's rate limiters and semaphores belong to the server's event loop,
+        # so running them on a second loop from a sync caller is not safe.
+        raise GatewaySyncCallError(
+            "GatewayChatModel only supports async calls: use ainvoke()/agenerate() "
+            "(e.g. AgentExecutor.arun/ainvoke) instead of invoke()/generate()."
+        )
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await self.gateway.invoke(messages, stop=stop, **kwargs)
@@ -10,35 +10,124 @@ from langchain.tools import BaseTool, tool
 from langchain_anthropic import ChatAnthropic
 from langchain_aws.chat_models import ChatBedrock
 from langchain.tools import StructuredTool
+from langchain_core.language_models.chat_models import BaseChatModel
+from botocore.config import Config as BotocoreConfig
 
-from vision_tools import browse_url, take_screenshot_base64, click_coordinates, type_text_at_coordinates, move_mouse
+from llm_gateway import LLMGateway, Provider, ProviderConfig
+from gateway_chat_model import GatewayChatModel, langchain_provider_call
+
+from src.playwright.playwright_manager import PlaywrightManager
+from vision_tools import browse_url, browse_urls, take_screenshot_base64, click_coordinates, type_text_at_coordinates, move_mouse
 from config import EXTERNAL_LLM_API_KEY, EXTERNAL_LLM_MODEL_NAME
 from langchain.agents.structured_chat.base import StructuredChatAgent
 from langchain.agents import AgentType, initialize_agent
 
+# --- LLM gateway configuration ---
+BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "us.anthropic.claude-3-7-sonnet-20250219-v1:0")
+BEDROCK_CREDENTIALS_PROFILE = os.getenv("BEDROCK_CREDENTIALS_PROFILE", "splunk-dev")
+BEDROCK_REGION = os.getenv("BEDROCK_REGION", "us-east-1")
+ANTHROPIC_MODEL_NAME = os.getenv("ANTHROPIC_MODEL_NAME", "claude-3-5-haiku-latest")
+ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+# Providers tried in order; the first that answers wins. Unconfigured providers are skipped.
+LLM_PROVIDER_ROUTE = os.getenv("LLM_PROVIDER_ROUTE", "bedrock,anthropic,google").split(",")
+LLM_REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", "1.0"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# --- End LLM gateway configuration ---
+
+# Providers are shared by every gateway that routes to them, so rate limits and
+# concurrency caps hold across tasks. Keyed by (provider name, model).
+_providers: Dict[tuple, Provider] = {}
+# One gateway (route over the shared providers) per requested model name.
+_gateways: Dict[str, LLMGateway] = {}
+
+
+def _build_chat_model(provider_name: str, external_llm_model_name: str, external_llm_api_key: str) -> Optional[BaseChatModel]:
+    # SDK-level retries are disabled: the gateway owns retry/backoff and its stats.
+    if provider_name == "bedrock":
+        return ChatBedrock(
+            model_id=BEDROCK_MODEL_ID,
+            credentials_profile_name=BEDROCK_CREDENTIALS_PROFILE,
+            region_name=BEDROCK_REGION,
+            model_kwargs={'temperature': 0.2},
+            # botocore counts max_attempts as retries; total_max_attempts=1 means a single call
+            config=BotocoreConfig(retries={"total_max_attempts": 1})
+        )
+    if provider_name == "anthropic" and ANTHROPIC_API_KEY:
+        return ChatAnthropic(
+            model=ANTHROPIC_MODEL_NAME,
+            max_tokens=1024,
+            api_key=ANTHROPIC_API_KEY,
+            temperature=0.2,
+            max_retries=0
+        )
+    if provider_name == "google" and external_llm_api_key:
+        return ChatGoogleGenerativeAI(
+            model=external_llm_model_name,
+            google_api_key=external_llm_api_key,
+            temperature=0.0,
+            max_retries=1 # Number of attempts, i.e. no SDK retries
+        )
+    return None
+
+
+def _get_provider(provider_name: str, external_llm_model_name: str, external_llm_api_key: str) -> Optional[Provider]:
+    # Only the Google provider uses the requested model name; Bedrock and Anthropic use their configured models.
+    model = external_llm_model_name if provider_name == "google" else None
+    key = (provider_name, model)
+    if key not in _providers:
+        try:
+            chat_model = _build_chat_model(provider_name, external_llm_model_name, external_llm_api_key)
+        except Exception as e:
+            # e.g. a missing AWS profile; skip it so the remaining providers can still serve
+            print(f"LLM provider '{provider_name}' could not be created ({type(e).__name__}: {e}), skipping.")
+            return None
+        if chat_model is None:
+            print(f"LLM provider '{provider_name}' is not configured, skipping.")
+            return None
+        config = ProviderConfig(
+            name=f"{provider_name}/{model}" if model else provider_name,
+            requests_per_second=LLM_REQUESTS_PER_SECOND,
+            burst=LLM_BURST,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            max_retries=LLM_MAX_RETRIES,
+        )
+        _providers[key] = Provider(config, langchain_provider_call(chat_model))
+    return _providers[key]
+
+
+def get_llm_gateway(
+    external_llm_model_name: str = EXTERNAL_LLM_MODEL_NAME,
+    external_llm_api_key: str = EXTERNAL_LLM_API_KEY,
+) -> LLMGateway:
+    """Returns the gateway for the requested model, built over the process-wide providers."""
+    if external_llm_model_name not in _gateways:
+        gateway = LLMGateway()
+        for provider_name in (name.strip() for name in LLM_PROVIDER_ROUTE):
+            provider = _get_provider(provider_name, external_llm_model_name, external_llm_api_key)
+            if provider is not None:
+                gateway.register(provider)
+        if not gateway.route:
+            # Not cached, so the next request tries to build the providers again
+            return gateway
+        _gateways[external_llm_model_name] = gateway
+    return _gateways[external_llm_model_name]
+
+
+def get_llm_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-provider stats for every provider created so far, without building any new ones."""
+    return {provider.name: provider.stats.as_dict() for provider in _providers.values()}
+
+
 async def run_agent_executor_task(
     prompt_messages: List[Dict[str, Any]],
     external_llm_model_name: str = EXTERNAL_LLM_MODEL_NAME,
     external_llm_api_key: str = EXTERNAL_LLM_API_KEY,
+    storage_profile: Optional[str] = None,
 ) -> str:
 
-    # llm = ChatGoogleGenerativeAI(
-    #     model=external_llm_model_name,
-    #     google_api_key=external_llm_api_key,
-    #     temperature=0.0
-    # )
-
-    llm= ChatBedrock(
-    model_id = "us.anthropic.claude-3-7-sonnet-20250219-v1:0",  # Replace with your desired Claude model
-    credentials_profile_name="splunk-dev",
-    region_name = "us-east-1", #"us-east-1", # Ensure AWS_REGION is set
-    model_kwargs={'temperature': 0.2}
-)
-#     llm=ChatAnthropic(
-#     model="claude-3-5-haiku-latest",
-#     max_tokens=1024,
-#     api_key="sk-ant-REDACTED" # Set this in your .env file
-# ) 
+    llm = GatewayChatModel(gateway=get_llm_gateway(external_llm_model_name, external_llm_api_key))
 
   
     
@@ -51,6 +140,13 @@ async def run_agent_executor_task(
             coroutine=browse_url,  # This is what gets called
             return_direct=False
         ),
+        StructuredTool.from_function(
+            func=browse_urls,
+            name="browse_urls",
+            description="Opens several URLs in parallel browser tabs and returns a combined summary of each page's title and text, with per-URL timing and errors. Use it to read or compare many pages in one step.",
+            coroutine=browse_urls,
+            return_direct=False
+        ),
         StructuredTool.from_function(
             func=take_screenshot_base64,
             name="take_screenshot_base64",
@@ -117,11 +213,14 @@ async def run_agent_executor_task(
         if msg["role"] == "user":
             formatted_prompt_messages.append(HumanMessage(content=msg["parts"][0]["text"]))
 
+    manager = await PlaywrightManager.get_instance()
     try:
-        # Use arun instead of invoke for async execution
-        response = await agent_executor.arun(
-            input=formatted_prompt_messages[0].content
-        )
+        # Each task browses in its own context, restored from and saved back to its storage profile
+        async with manager.task_context(storage_profile=storage_profile):
+            # Use arun instead of invoke for async execution
+            response = await agent_executor.arun(
+                input=formatted_prompt_messages[0].content
+            )
         return response
     except Exception as e:
         print(f"Error during agent execution: {e}")
@@ -0,0 +1,270 @@
+# llm_gateway.py
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ProviderCall = Callable[..., Awaitable[Any]]
+
+
+class ProviderError(Exception):
+    """Raised by a provider call that failed in a way the gateway understands."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class RateLimitError(ProviderError):
+    """Raised when a provider throttles us. retry_after is in seconds, if known."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, retryable=True)
+        self.retry_after = retry_after
+
+
+class GatewayError(Exception):
+    """Raised when every provider in the route failed."""
+
+    def __init__(self, message: str, errors: Dict[str, BaseException]):
+        super().__init__(message)
+        self.errors = errors
+
+
+# Class names / codes used by boto (Bedrock), anthropic and google for throttling.
+_RATE_LIMIT_MARKERS = ("ratelimit", "throttl", "resourceexhausted", "toomanyrequests")
+_TRANSIENT_MARKERS = ("serviceunavailable", "overloaded", "internalservererror", "timeout", "modelnotready")
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if isinstance(status, int):
+        return status
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):  # botocore ClientError
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if isinstance(status, int):
+            return status
+    return getattr(response, "status_code", None) if response is not None else None
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Best-effort detection of throttling errors across provider SDKs."""
+    if isinstance(exc, RateLimitError):
+        return True
+    if _status_code(exc) == 429:
+        return True
+    text = f"{type(exc).__name__} {exc}".lower().replace("_", "")
+    return any(marker in text for marker in _RATE_LIMIT_MARKERS)
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """Rate limits, timeouts, connection drops and 5xx responses are worth retrying."""
+    if isinstance(exc, ProviderError):
+        return exc.retryable
+    if is_rate_limit_error(exc):
+        return True
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(exc)
+    if isinstance(status, int) and (status >= 500 or status == 408):
+        return True
+    # Match the message too: ChatBedrock wraps service errors in a plain ValueError.
+    text = f"{type(exc).__name__} {exc}".lower().replace("_", "")
+    return any(marker in text for marker in _TRANSIENT_MARKERS)
+
+
+class TokenBucket:
+    """Async token bucket: refills `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("TokenBucket rate and capacity must be positive.")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Waits until `tokens` are available and takes them."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def drain(self):
+        """Empties the bucket, e.g. after the provider reported a rate limit."""
+        self._refill()
+        self._tokens = 0.0
+
+
+@dataclass
+class ProviderConfig:
+    name: str
+    requests_per_second: float = 1.0
+    burst: int = 5
+    max_concurrency: int = 4
+    max_retries: int = 3
+    base_backoff: float = 1.0
+    max_backoff: float = 30.0
+    timeout: Optional[float] = 120.0
+
+
+@dataclass
+class ProviderStats:
+    calls: int = 0
+    successes: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    retries: int = 0
+    in_flight: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    last_error: Optional[str] = None
+    errors_by_type: Dict[str, int] = field(default_factory=dict)
+
+    def record_success(self, latency: float):
+        self.successes += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def record_error(self, exc: BaseException, latency: float):
+        self.errors += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        name = type(exc).__name__
+        self.errors_by_type[name] = self.errors_by_type.get(name, 0) + 1
+        self.last_error = f"{name}: {exc}"
+        if is_rate_limit_error(exc):
+            self.rate_limited += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        attempts = self.successes + self.errors
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "avg_latency_ms": round(self.total_latency / attempts * 1000, 2) if attempts else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 2),
+            "error_rate": round(self.errors / attempts, 4) if attempts else 0.0,
+            "errors_by_type": dict(self.errors_by_type),
+            "last_error": self.last_error,
+        }
+
+
+class Provider:
+    """One LLM backend behind the gateway, with its own rate limit, concurrency cap and stats."""
+
+    def __init__(self, config: ProviderConfig, call: ProviderCall):
+        self.config = config
+        self.name = config.name
+        self._call = call
+        self._bucket = TokenBucket(config.requests_per_second, config.burst)
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.stats = ProviderStats()
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        retry_after = getattr(exc, "retry_after", None)
+        if isinstance(retry_after, (int, float)) and retry_after > 0:
+            return min(float(retry_after), self.config.max_backoff)
+        # Full jitter: uniform in [0, min(max_backoff, base * 2^attempt)].
+        ceiling = min(self.config.max_backoff, self.config.base_backoff * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def _attempt(self, *args, **kwargs) -> Any:
+        await self._bucket.acquire()
+        async with self._semaphore:
+            self.stats.in_flight += 1
+            started = time.monotonic()
+            try:
+                if self.config.timeout:
+                    result = await asyncio.wait_for(self._call(*args, **kwargs), self.config.timeout)
+                else:
+                    result = await self._call(*args, **kwargs)
+            except Exception as e:
+                self.stats.record_error(e, time.monotonic() - started)
+                raise
+            else:
+                self.stats.record_success(time.monotonic() - started)
+                return result
+            finally:
+                self.stats.in_flight -= 1
+
+    async def invoke(self, *args, **kwargs) -> Any:
+        """Calls the provider, retrying retryable errors with jittered exponential backoff."""
+        self.stats.calls += 1
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= self.config.max_retries:
+                    raise
+                if is_rate_limit_error(e):
+                    self._bucket.drain()
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self.stats.retries += 1
+                logger.warning(f"LLM provider '{self.name}' failed ({type(e).__name__}: {e}); retry {attempt}/{self.config.max_retries} in {delay:.2f}s.")
+                await asyncio.sleep(delay)
+
+
+class LLMGateway:
+    """Routes LLM calls to an ordered list of providers, failing over to the next on error."""
+
+    def __init__(self, providers: Optional[List[Provider]] = None):
+        self._providers: Dict[str, Provider] = {}
+        self._route: List[str] = []
+        for provider in providers or []:
+            self.register(provider)
+
+    def register(self, provider: Provider):
+        """Adds a provider at the end of the failover route."""
+        if provider.name in self._providers:
+            raise ValueError(f"Provider '{provider.name}' is already registered.")
+        self._providers[provider.name] = provider
+        self._route.append(provider.name)
+
+    def get_provider(self, name: str) -> Provider:
+        return self._providers[name]
+
+    @property
+    def route(self) -> List[str]:
+        return list(self._route)
+
+    async def invoke(self, *args, route: Optional[List[str]] = None, **kwargs) -> Any:
+        """Calls providers in route order and returns the first successful result."""
+        names = route or self._route
+        if not names:
+            raise GatewayError("No LLM providers registered.", {})
+        errors: Dict[str, BaseException] = {}
+        for name in names:
+            provider = self._providers[name]
+            try:
+                return await provider.invoke(*args, **kwargs)
+            except Exception as e:
+                errors[name] = e
+                logger.error(f"LLM provider '{name}' gave up: {type(e).__name__}: {e}")
+        summary = "; ".join(f"{name}: {type(e).__name__}: {e}" for name, e in errors.items())
+        raise GatewayError(f"All LLM providers failed ({summary})", errors)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self._providers[name].stats.as_dict() for name in self._route}
+
@@ -1,8 +1,34 @@
 import asyncio
 import os
+import re
 import time
-from typing import Optional, Any
-from playwright.async_api import async_playwright, Browser, Page, Playwright
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional, Any
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+from src.playwright.storage_state_store import StorageStateStore, storage_state_covers_url
+
+VIEWPORT = {"width": 800, "height": 600}
+# URL paths that usually mean we were bounced to a sign-in page.
+_LOGIN_URL_RE = re.compile(r"/(login|log-in|signin|sign-in|sign_in|auth|sso|oauth)\b", re.IGNORECASE)
+
+
+@dataclass
+class TaskBrowserContext:
+    """A browser context owned by one agent task, optionally backed by a storage profile."""
+    context: BrowserContext
+    page: Page
+    storage_profile: Optional[str] = None
+    loaded_at: float = 0.0
+    profile_state: Optional[Dict[str, Any]] = None # The storage state the context was created from
+    login_wall_seen: bool = False
+
+
+# Set for the duration of PlaywrightManager.task_context(); tools running inside the task see its page.
+_current_task_context: ContextVar[Optional[TaskBrowserContext]] = ContextVar("current_task_context", default=None)
+
 
 class PlaywrightManager:
     _instance: Optional['PlaywrightManager'] = None # Stores the singleton instance
@@ -13,6 +39,7 @@ class PlaywrightManager:
     _save_screenshots_locally: bool = False
     _screenshots_dir: str = "screenshots"
     _screenshot_counter: int = 0 # To ensure unique screenshot filenames
+    _storage_state_store: Optional[StorageStateStore] = None # Named cookie/localStorage profiles
 
     def __init__(self):
         # Prevent direct instantiation, enforce singleton
@@ -37,30 +64,125 @@ class PlaywrightManager:
             os.makedirs(self._screenshots_dir)
         print(f"PlaywrightManager configured: Headless={self._headless}, Save Screenshots={self._save_screenshots_locally}, Dir='{self._screenshots_dir}'")
 
+    def set_storage_state_store(self, store: Optional[StorageStateStore]):
+        """Enables named storage-state profiles for task contexts."""
+        self._storage_state_store = store
 
     async def launch_browser(self):
         """Launches the Playwright browser and creates a single persistent page."""
-        if self._browser is None:
-            self._playwright_context = await async_playwright().start()
+        if self._browser is None or not self._browser.is_connected():
+            # A browser that crashed or was closed underneath us is replaced, not reused
+            if self._playwright_context is None:
+                self._playwright_context = await async_playwright().start()
             self._browser = await self._playwright_context.chromium.launch(headless=self._headless)
             # Create ONE persistent page for all interactions with viewport size 800x600
-            self._page = await self._browser.new_page(viewport={"width": 800, "height": 600})
+            self._page = await self._browser.new_page(viewport=VIEWPORT)
             self._screenshot_counter = 0 # Reset counter for a new browser session
             print("Playwright browser launched and persistent page created with viewport 800x600.")
         else:
             print("Playwright browser already launched.")
 
     async def get_page(self) -> Page:
-        """Returns the single persistent Playwright page."""
+        """Returns the current task's page, or the single persistent Playwright page outside a task context."""
+        task_context = _current_task_context.get()
+        if task_context is not None and not task_context.page.is_closed():
+            return task_context.page
         if self._page is None or self._page.is_closed():
             # If the page was somehow closed, re-create it within the existing browser
-            if self._browser is None or self._browser.is_closed():
+            if self._browser is None or not self._browser.is_connected():
                 await self.launch_browser() # Re-launch browser if necessary
             else:
-                self._page = await self._browser.new_page(viewport={"width": 800, "height": 600}) # Create new page if only page was closed
+                self._page = await self._browser.new_page(viewport=VIEWPORT) # Create new page if only page was closed
                 print("Recreated Playwright page with viewport 800x600.")
         return self._page
 
+    def get_task_context(self) -> Optional[TaskBrowserContext]:
+        """Returns the browser context of the task currently running, if any."""
+        return _current_task_context.get()
+
+    @asynccontextmanager
+    async def task_context(self, storage_profile: Optional[str] = None) -> AsyncIterator[Optional[TaskBrowserContext]]:
+        """Runs a task in its own browser context, loading and saving the named storage profile.
+
+        Without a profile (or without a configured store) nothing changes: the task keeps
+        using the shared persistent page and its cookies, and None is yielded.
+        """
+        store = self._storage_state_store
+        if storage_profile and store is None:
+            print(f"Storage profile '{storage_profile}' requested but no storage-state store is configured; using the shared page.")
+        if not storage_profile or store is None:
+            yield None
+            return
+
+        if self._browser is None or not self._browser.is_connected():
+            await self.launch_browser()
+        loaded_at = time.time()
+        storage_state = await store.load(storage_profile)
+        context = await self._browser.new_context(viewport=VIEWPORT, storage_state=storage_state)
+        try:
+            page = await context.new_page()
+        except BaseException:
+            await context.close()
+            raise
+        task = TaskBrowserContext(
+            context=context,
+            page=page,
+            storage_profile=storage_profile,
+            loaded_at=loaded_at,
+            profile_state=storage_state,
+        )
+        if storage_state:
+            print(f"Task context created from storage profile '{storage_profile}'.")
+        token = _current_task_context.set(task)
+        try:
+            yield task
+        finally:
+            _current_task_context.reset(token)
+            # Saving and closing are best-effort: they must not replace the task's own result or error.
+            try:
+                await self._save_storage_profile(task)
+            except Exception as e:
+                print(f"Failed to save storage profile '{storage_profile}': {e}")
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"Failed to close task browser context: {e}")
+
+    async def _save_storage_profile(self, task: TaskBrowserContext):
+        # Never persist a session that ended on a login wall; it is not logged in.
+        if not task.page.is_closed() and await self.is_login_wall(task.page):
+            print(f"Not saving storage profile '{task.storage_profile}': task ended on a login page.")
+            return
+        state = await task.context.storage_state()
+        await self._storage_state_store.save(task.storage_profile, state, loaded_at=task.loaded_at, base_state=task.profile_state)
+
+    async def is_login_wall(self, page: Page) -> bool:
+        """Heuristic: a visible password field, or a URL that looks like a sign-in page."""
+        try:
+            if _LOGIN_URL_RE.search(page.url or ""):
+                return True
+            return await page.locator("input[type='password']:visible").count() > 0
+        except Exception as e:
+            print(f"Login wall check failed: {e}")
+            return False
+
+    async def check_login_wall(self, page: Page) -> bool:
+        """Invalidates the current task's storage profile the first time it lands on one of
+        the profile's own sites showing a login wall. Returns whether the page is a login wall."""
+        if not await self.is_login_wall(page):
+            return False
+        task = _current_task_context.get()
+        if task is None or task.login_wall_seen or page.context != task.context:
+            return True
+        # Sign-in pages of sites the profile holds no session for say nothing about the profile.
+        if not storage_state_covers_url(task.profile_state, page.url):
+            return True
+        task.login_wall_seen = True
+        await self._storage_state_store.invalidate(task.storage_profile)
+        # Whatever this context does from here on is a fresh login, so its final state may be saved.
+        task.loaded_at = time.time()
+        return True
+
     async def close_browser(self):
         """Closes the Playwright browser and context."""
         if self._browser:
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from cryptography.fernet import Fernet, InvalidToken
+
+_PROFILE_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+_FORMAT_VERSION = 1
+
+
+def is_valid_profile_name(name: Any) -> bool:
+    """Profile names become file names, so only a conservative character set is allowed."""
+    return isinstance(name, str) and _PROFILE_NAME_RE.match(name) is not None
+
+
+def storage_state_covers_url(state: Optional[Dict[str, Any]], url: str) -> bool:
+    """Whether `state` holds a cookie or localStorage origin for the site serving `url`."""
+    if not state or not url:
+        return False
+    parsed = urlsplit(url)
+    host = (parsed.hostname or "").lower()
+    if not host:
+        return False
+    origin = f"{parsed.scheme}://{parsed.netloc}".lower()
+    if any((o.get("origin") or "").lower() == origin for o in state.get("origins", [])):
+        return True
+    for cookie in state.get("cookies", []):
+        domain = (cookie.get("domain") or "").lower().lstrip(".")
+        if domain and (host == domain or host.endswith("." + domain)):
+            return True
+    return False
+
+
+def _cookie_key(cookie: Dict[str, Any]) -> tuple:
+    return (cookie.get("name"), cookie.get("domain"), cookie.get("path"))
+
+
+def _origin_key(origin: Dict[str, Any]) -> Any:
+    return origin.get("origin")
+
+
+def _merge_entries(current: List[Dict[str, Any]], base: List[Dict[str, Any]], update: List[Dict[str, Any]], key) -> List[Dict[str, Any]]:
+    base_keys = {key(e) for e in base}
+    merged = {key(e): e for e in current if key(e) not in base_keys}
+    merged.update((key(e), e) for e in update)
+    return list(merged.values())
+
+
+def merge_storage_states(
+    current: Optional[Dict[str, Any]],
+    base: Optional[Dict[str, Any]],
+    update: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Three-way merge of Playwright storage states.
+
+    `current` is what is on disk now, `base` what the saving context was created from and
+    `update` its final state. The result is `update` plus whatever other writers added to
+    `current` since `base`. Entries the context had loaded but no longer has (a logout,
+    a cleared session) are dropped. Cookies are keyed by (name, domain, path) and
+    localStorage by origin.
+    """
+    current, base = current or {}, base or {}
+    return {
+        "cookies": _merge_entries(current.get("cookies", []), base.get("cookies", []), update.get("cookies", []), _cookie_key),
+        "origins": _merge_entries(current.get("origins", []), base.get("origins", []), update.get("origins", []), _origin_key),
+    }
+
+
+def _drop_expired_cookies(cookies: List[Dict[str, Any]], now: float) -> List[Dict[str, Any]]:
+    # Playwright uses expires == -1 for session cookies.
+    return [c for c in cookies if c.get("expires", -1) in (-1, None) or c["expires"] > now]
+
+
+class StorageStateStore:
+    """Named Playwright storage-state profiles (cookies + localStorage), encrypted at rest.
+
+    Each profile is one Fernet-encrypted JSON file in `directory`. Profiles created more
+    than `ttl_seconds` ago are treated as missing and removed on load; saving into an
+    existing profile keeps its creation time, so regular use does not extend its life.
+    """
+
+    def __init__(self, directory: str, key: str, ttl_seconds: float = 12 * 3600):
+        self._directory = directory
+        self._fernet = Fernet(key)
+        self._ttl_seconds = ttl_seconds
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._invalidated_at: Dict[str, float] = {}
+        os.makedirs(self._directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        if not is_valid_profile_name(name):
+            raise ValueError(f"Invalid storage profile name '{name}'. Use letters, digits, '.', '_' or '-'.")
+        return os.path.join(self._directory, f"{name}.state")
+
+    def _lock(self, name: str) -> asyncio.Lock:
+        if name not in self._locks:
+            self._locks[name] = asyncio.Lock()
+        return self._locks[name]
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            token = f.read()
+        try:
+            payload = json.loads(self._fernet.decrypt(token))
+        except (InvalidToken, ValueError):
+            print(f"Storage profile '{name}' could not be decrypted, discarding it.")
+            self._remove(name)
+            return None
+        if payload.get("version") != _FORMAT_VERSION:
+            self._remove(name)
+            return None
+        created_at = payload.get("created_at", payload.get("saved_at", 0))
+        if time.time() - created_at > self._ttl_seconds:
+            print(f"Storage profile '{name}' expired, discarding it.")
+            self._remove(name)
+            return None
+        return payload
+
+    def _write(self, name: str, state: Dict[str, Any], created_at: float):
+        payload = {"version": _FORMAT_VERSION, "created_at": created_at, "saved_at": time.time(), "state": state}
+        token = self._fernet.encrypt(json.dumps(payload).encode("utf-8"))
+        # Write to a temp file and rename so readers never see a half-written profile.
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(token)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self._path(name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _remove(self, name: str):
+        path = self._path(name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    async def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """Returns the profile's storage state, or None if it is missing, expired or unreadable."""
+        async with self._lock(name):
+            payload = await asyncio.to_thread(self._read, name)
+        if payload is None:
+            return None
+        state = payload["state"]
+        state["cookies"] = _drop_expired_cookies(state.get("cookies", []), time.time())
+        return state
+
+    async def save(
+        self,
+        name: str,
+        state: Dict[str, Any],
+        loaded_at: Optional[float] = None,
+        base_state: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Merges `state` into the profile on disk.
+
+        `base_state` is the state the caller's context was created from (None if it
+        started empty); see merge_storage_states.
+
+        `loaded_at` is when the caller's context was created from this profile. Snapshots
+        from contexts created before the profile was last invalidated are dropped, since
+        they carry the session that was just found to be logged out.
+        """
+        async with self._lock(name):
+            if loaded_at is not None and loaded_at < self._invalidated_at.get(name, 0):
+                print(f"Skipping save of storage profile '{name}': it was invalidated after this context loaded it.")
+                return False
+            existing = await asyncio.to_thread(self._read, name)
+            merged = merge_storage_states(existing["state"] if existing else None, base_state, state)
+            merged["cookies"] = _drop_expired_cookies(merged["cookies"], time.time())
+            created_at = existing.get("created_at", existing.get("saved_at")) if existing else time.time()
+            await asyncio.to_thread(self._write, name, merged, created_at)
+        print(f"Storage profile '{name}' saved ({len(merged['cookies'])} cookies, {len(merged['origins'])} origins).")
+        return True
+
+    async def invalidate(self, name: str):
+        """Deletes the profile, e.g. after its session turned out to be logged out."""
+        async with self._lock(name):
+            self._invalidated_at[name] = time.time()
+            await asyncio.to_thread(self._remove, name)
+        print(f"Storage profile '{name}' invalidated.")
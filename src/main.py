@@ -11,9 +11,10 @@ from typing import Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
 from pydantic import BaseModel, Field
 
-from langchain_agent import run_agent_executor_task
+from langchain_agent import run_agent_executor_task, get_llm_stats
 from config import EXTERNAL_LLM_MODEL_NAME, EXTERNAL_LLM_API_KEY
 from src.playwright.playwright_manager import PlaywrightManager
+from src.playwright.storage_state_store import StorageStateStore, is_valid_profile_name
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -46,6 +47,12 @@ HEADLESS_MODE = False
 SAVE_SCREENSHOTS_LOCALLY = True
 SCREENSHOTS_DIR = "screenshots"
 
+# Named storage-state profiles (cookies + localStorage) let tasks skip logging in again.
+# Profiles are encrypted with STORAGE_STATE_KEY (a Fernet key); without it they are disabled.
+STORAGE_STATE_DIR = "storage_states"
+STORAGE_STATE_TTL_SECONDS = 12 * 60 * 60
+STORAGE_STATE_KEY = os.getenv("STORAGE_STATE_KEY")
+
 if SAVE_SCREENSHOTS_LOCALLY and not os.path.exists(SCREENSHOTS_DIR):
     os.makedirs(SCREENSHOTS_DIR)
 # --- End Configuration ---
@@ -54,13 +61,15 @@ async def _run_langchain_agent_task(
     request_id: str,
     messages: list,
     model_name: str,
-    future: asyncio.Future
+    future: asyncio.Future,
+    storage_profile: Optional[str] = None
 ):
     logger.info(f"Starting LangChain Agent task for request_id: {request_id}")
     try:
         final_answer = await run_agent_executor_task(
             prompt_messages=messages,
             external_llm_model_name=model_name,
+            storage_profile=storage_profile,
         )
         response_data = {
             "role": "assistant",
@@ -110,10 +119,14 @@ async def handle_mcp_request(mcp_request: MCPRequest, background_tasks: Backgrou
     if method == "llm_query":
         messages = params.get("messages")
         model_name = params.get("model_name", EXTERNAL_LLM_MODEL_NAME)
+        storage_profile = params.get("storage_profile")
 
         if not messages:
             raise HTTPException(status_code=400, detail="'messages' are required for 'llm_query'.")
 
+        if storage_profile is not None and not is_valid_profile_name(storage_profile):
+            raise HTTPException(status_code=400, detail="'storage_profile' must be 1-64 characters of letters, digits, '.', '_' or '-'.")
+
         if request_id in _pending_requests:
             raise HTTPException(status_code=409, detail=f"Request with ID {request_id} is already processing.")
 
@@ -125,7 +138,8 @@ async def handle_mcp_request(mcp_request: MCPRequest, background_tasks: Backgrou
             request_id,
             messages,
             model_name,
-            task_future
+            task_future,
+            storage_profile
         )
 
         return MCPResponse(
@@ -151,10 +165,19 @@ async def get_mcp_result(request_id: str, background_tasks: BackgroundTasks):
         logger.warning(f"Request ID {request_id} not found in pending or completed cache (or expired).")
         raise HTTPException(status_code=404, detail="Result not found or has expired.")
 
+@app.get("/mcp/llm/stats")
+async def llm_stats():
+    """Per-provider call, retry, error and latency counters from the LLM gateway."""
+    return {"providers": get_llm_stats()}
+
 @app.on_event("startup")
 async def startup_event():
     manager = await PlaywrightManager.get_instance()
     manager.set_config(headless=HEADLESS_MODE, save_screenshots_locally=SAVE_SCREENSHOTS_LOCALLY, screenshots_dir=SCREENSHOTS_DIR)
+    if STORAGE_STATE_KEY:
+        manager.set_storage_state_store(StorageStateStore(STORAGE_STATE_DIR, STORAGE_STATE_KEY, ttl_seconds=STORAGE_STATE_TTL_SECONDS))
+    else:
+        logger.info("STORAGE_STATE_KEY not set; storage-state profiles are disabled.")
     await manager.launch_browser()
     logger.info("Playwright browser launched and configured via PlaywrightManager.")
 
@@ -0,0 +1,123 @@
+# parallel_browse.py
+# Fan-out core of the browse_urls tool. Works on any Playwright-like BrowserContext,
+# so it has no dependency on the PlaywrightManager singleton.
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limits for browse_urls fan-out
+BROWSE_URLS_MAX_URLS = 20
+BROWSE_URLS_DEFAULT_TABS = 5
+BROWSE_URLS_MAX_TABS = 10
+BROWSE_URLS_BATCH_TIMEOUT_SECONDS = 45.0
+BROWSE_URLS_MAX_TOTAL_CHARS = 12000 # Budget for page text, split across the pages that loaded
+BROWSE_URLS_MAX_OUTPUT_CHARS = 16000 # Hard cap on the whole observation
+BROWSE_URLS_MAX_FIELD_CHARS = 200 # Titles, URLs and error messages
+
+LoginCheck = Callable[[Any], Awaitable[bool]]
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def short_error(exc: BaseException) -> str:
+    """First line of an error, clipped. Playwright errors carry multi-line call logs."""
+    lines = str(exc).strip().splitlines()
+    first_line = lines[0] if lines else type(exc).__name__
+    return _clip(first_line, BROWSE_URLS_MAX_FIELD_CHARS)
+
+
+def normalize_urls(urls: List[str]) -> Tuple[List[str], List[str]]:
+    """Strips and de-duplicates URLs keeping their order. Returns (to_browse, skipped_over_limit)."""
+    unique = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+    return unique[:BROWSE_URLS_MAX_URLS], unique[BROWSE_URLS_MAX_URLS:]
+
+
+def clamp_tabs(max_tabs: int) -> int:
+    return max(1, min(max_tabs, BROWSE_URLS_MAX_TABS))
+
+
+async def fetch_page_summary(context, url: str, semaphore: asyncio.Semaphore, login_check: Optional[LoginCheck] = None) -> Dict[str, Any]:
+    """Loads one URL in its own tab and returns its title and visible text."""
+    async with semaphore:
+        started = time.monotonic()
+        page = None
+        try:
+            page = await context.new_page()
+            await page.goto(url, wait_until="domcontentloaded")
+            title = await page.title()
+            text = await page.evaluate("() => document.body ? document.body.innerText : ''")
+            login_wall = await login_check(page) if login_check else False
+            return {
+                "url": url,
+                "ok": True,
+                "title": title,
+                "text": " ".join((text or "").split()),
+                "login_wall": login_wall,
+                "elapsed": time.monotonic() - started,
+            }
+        except Exception as e:
+            logger.warning(f"browse_urls failed for {url}: {short_error(e)}")
+            return {"url": url, "ok": False, "error": short_error(e), "elapsed": time.monotonic() - started}
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception as e:
+                    logger.warning(f"browse_urls could not close tab for {url}: {short_error(e)}")
+
+
+async def fetch_pages(context, urls: List[str], max_tabs: int, login_check: Optional[LoginCheck] = None) -> Tuple[List[Dict[str, Any]], float]:
+    """Fetches `urls` in parallel tabs under the batch timeout. Returns (results in URL order, elapsed)."""
+    semaphore = asyncio.Semaphore(clamp_tabs(max_tabs))
+    started = time.monotonic()
+    tasks = [asyncio.ensure_future(fetch_page_summary(context, url, semaphore, login_check)) for url in urls]
+    done, pending = await asyncio.wait(tasks, timeout=BROWSE_URLS_BATCH_TIMEOUT_SECONDS)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    batch_elapsed = time.monotonic() - started
+
+    results = []
+    for url, task in zip(urls, tasks):
+        if task in done:
+            results.append(task.result())
+        else:
+            results.append({"url": url, "ok": False, "error": f"timed out after {BROWSE_URLS_BATCH_TIMEOUT_SECONDS:.0f}s batch limit", "elapsed": batch_elapsed})
+    return results, batch_elapsed
+
+
+def format_browse_summary(results: List[Dict[str, Any]], batch_elapsed: float, skipped: List[str]) -> str:
+    """One observation for the agent: a header, then one line per URL, capped in size."""
+    succeeded = [r for r in results if r["ok"]]
+    # Split the text budget evenly across the pages that actually loaded
+    per_page_chars = BROWSE_URLS_MAX_TOTAL_CHARS // max(1, len(succeeded))
+    lines = [f"Browsed {len(results)} URLs in {batch_elapsed:.1f}s: {len(succeeded)} succeeded, {len(results) - len(succeeded)} failed."]
+    for i, r in enumerate(results, 1):
+        url = _clip(r["url"], BROWSE_URLS_MAX_FIELD_CHARS)
+        if r["ok"]:
+            text = r["text"]
+            snippet = _clip(text, per_page_chars)
+            title = _clip(r["title"] or "", BROWSE_URLS_MAX_FIELD_CHARS)
+            login_note = " [login page]" if r["login_wall"] else ""
+            lines.append(f"[{i}] {url} ({r['elapsed']:.1f}s) Title: '{title}'{login_note}. Text length: {len(text)}. Text: {snippet}")
+        else:
+            lines.append(f"[{i}] {url} ({r['elapsed']:.1f}s) FAILED: {r['error']}")
+    if skipped:
+        lines.append(f"Skipped {len(skipped)} URLs over the {BROWSE_URLS_MAX_URLS}-URL limit.")
+    return _clip("\n".join(lines), BROWSE_URLS_MAX_OUTPUT_CHARS)
+
+
+async def browse_urls_in_context(context, urls: List[str], max_tabs: int = BROWSE_URLS_DEFAULT_TABS, login_check: Optional[LoginCheck] = None) -> str:
+    """Fetches and summarises `urls` in parallel tabs of `context`."""
+    urls, skipped = normalize_urls(urls)
+    if not urls:
+        raise ValueError("browse_urls needs at least one URL.")
+    results, batch_elapsed = await fetch_pages(context, urls, max_tabs, login_check)
+    logger.info(f"browse_urls: {sum(r['ok'] for r in results)}/{len(urls)} pages loaded in {batch_elapsed:.1f}s.")
+    return format_browse_summary(results, batch_elapsed, skipped)
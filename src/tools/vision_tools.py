@@ -1,6 +1,7 @@
 # vision_tools.py
 from playwright.async_api import Page
 from src.playwright.playwright_manager import PlaywrightManager
+from parallel_browse import BROWSE_URLS_DEFAULT_TABS, browse_urls_in_context
 import asyncio
 import base64
 import logging
@@ -20,11 +21,29 @@ async def browse_url(url: str) -> str:
         await page.goto(url, wait_until="domcontentloaded")
         title = await page.title() # Get page title for a more meaningful summary
         content = await page.content()
-        return f"Successfully navigated to {url}. Page Title: '{title}'. Page content length: {len(content)}. First 500 chars: {content[:500]}..."
+        login_note = ""
+        if await manager.check_login_wall(page):
+            login_note = " Landed on a login page: you need to log in to continue (any saved session for this site has expired and was discarded)."
+        return f"Successfully navigated to {url}. Page Title: '{title}'. Page content length: {len(content)}.{login_note} First 500 chars: {content[:500]}..."
     except Exception as e:
         logger.error(f"Error Browse URL {url}: {e}")
         raise ToolExecutionError(f"Error Browse URL {url}: {e}")
 
+async def browse_urls(urls: List[str], max_tabs: int = BROWSE_URLS_DEFAULT_TABS) -> str:
+    """Opens several URLs in parallel tabs and returns one combined, size-capped summary of their text.
+    Use this instead of repeated browse_url calls when you need to read or compare many pages.
+    Args:
+        urls (List[str]): The URLs to load.
+        max_tabs (int): How many tabs to open at once. Defaults to 5.
+    """
+    manager = await PlaywrightManager.get_instance()
+    task_context = manager.get_task_context()
+    context = task_context.context if task_context is not None else (await manager.get_page()).context
+    try:
+        return await browse_urls_in_context(context, urls, max_tabs, login_check=manager.check_login_wall)
+    except ValueError as e:
+        raise ToolExecutionError(str(e))
+
 async def take_screenshot_base64() -> str:
     """Takes a full-page screenshot and returns it as a base64 encoded PNG string.
     This image should then be sent to an LLM with vision capabilities (like Gemini)
@@ -0,0 +1,32 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+
+class FakeProvider:
+    """Scripted in-process provider call for gateway tests.
+
+    `script` items are returned in order; exception instances in it are raised instead.
+    Once the script is exhausted, `default` is returned.
+    """
+
+    def __init__(self, script: Optional[List[Any]] = None, default: Any = "ok", latency: float = 0.0):
+        self._script = list(script or [])
+        self.default = default
+        self.latency = latency
+        self.calls: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        self.calls.append({"args": args, "kwargs": kwargs})
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            item = self._script.pop(0) if self._script else self.default
+            if isinstance(item, BaseException):
+                raise item
+            return item
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "agent"))
+
+from fake_provider import FakeProvider  # noqa: E402
+from llm_gateway import (  # noqa: E402
+    GatewayError,
+    LLMGateway,
+    Provider,
+    ProviderConfig,
+    ProviderError,
+    RateLimitError,
+    TokenBucket,
+    is_retryable_error,
+)
+
+
+def _provider(name: str, fake: FakeProvider, **overrides) -> Provider:
+    config = ProviderConfig(name=name, requests_per_second=1000, burst=1000, base_backoff=0.001, max_backoff=0.01)
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return Provider(config, fake)
+
+
+def test_retries_rate_limit_then_succeeds():
+    fake = FakeProvider(script=[RateLimitError("slow down", retry_after=0.001), "answer"])
+    gateway = LLMGateway([_provider("primary", fake)])
+
+    assert asyncio.run(gateway.invoke("hi")) == "answer"
+    stats = gateway.stats()["primary"]
+    assert len(fake.calls) == 2
+    assert stats["retries"] == 1
+    assert stats["rate_limited"] == 1
+    assert stats["successes"] == 1
+
+
+def test_non_retryable_error_fails_over_without_retry():
+    primary = FakeProvider(script=[ProviderError("bad request", retryable=False)])
+    secondary = FakeProvider(default="fallback answer")
+    gateway = LLMGateway([_provider("primary", primary), _provider("secondary", secondary)])
+
+    assert asyncio.run(gateway.invoke("hi")) == "fallback answer"
+    assert len(primary.calls) == 1
+    assert gateway.stats()["primary"]["errors"] == 1
+    assert gateway.stats()["secondary"]["successes"] == 1
+
+
+def test_all_providers_failing_raises_gateway_error():
+    primary = FakeProvider(script=[ConnectionError("down")] * 3)
+    secondary = FakeProvider(script=[ProviderError("nope")])
+    gateway = LLMGateway([_provider("primary", primary, max_retries=2), _provider("secondary", secondary)])
+
+    with pytest.raises(GatewayError) as excinfo:
+        asyncio.run(gateway.invoke("hi"))
+    assert set(excinfo.value.errors) == {"primary", "secondary"}
+    assert len(primary.calls) == 3
+
+
+def test_concurrency_is_bounded():
+    fake = FakeProvider(latency=0.01)
+    provider = _provider("primary", fake, max_concurrency=2)
+    gateway = LLMGateway([provider])
+
+    async def run():
+        return await asyncio.gather(*(gateway.invoke(i) for i in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert fake.max_in_flight == 2
+
+
+def test_token_bucket_waits_for_refill():
+    now = [0.0]
+    bucket = TokenBucket(rate=10, capacity=1, clock=lambda: now[0])
+
+    async def run():
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        now[0] += 0.1
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(run())
+
+
+def test_wrapped_bedrock_service_error_is_retried():
+    wrapped = ValueError("Error raised by bedrock service: An error occurred (ServiceUnavailableException) when calling the InvokeModel operation")
+    fake = FakeProvider(script=[wrapped, "answer"])
+    gateway = LLMGateway([_provider("bedrock", fake)])
+
+    assert is_retryable_error(wrapped)
+    assert asyncio.run(gateway.invoke("hi")) == "answer"
+    assert gateway.stats()["bedrock"]["retries"] == 1
+
+
+def test_gateway_chat_model_agenerate_uses_gateway():
+    pytest.importorskip("langchain_core")
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    from gateway_chat_model import GatewayChatModel, GatewaySyncCallError
+
+    result = ChatResult(generations=[ChatGeneration(message=AIMessage(content="from fake"))])
+    fake = FakeProvider(script=[ConnectionError("blip"), result])
+    model = GatewayChatModel(gateway=LLMGateway([_provider("primary", fake)]))
+    messages = [HumanMessage(content="hi")]
+
+    assert asyncio.run(model._agenerate(messages, stop=["Observation:"])) is result
+    assert fake.calls[-1] == {"args": (messages,), "kwargs": {"stop": ["Observation:"]}}
+    with pytest.raises(GatewaySyncCallError):
+        model.invoke("hi")
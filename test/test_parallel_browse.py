@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "tools"))
+
+import parallel_browse  # noqa: E402
+from parallel_browse import browse_urls_in_context, clamp_tabs, normalize_urls  # noqa: E402
+
+
+class FakePage:
+    def __init__(self, context, delays, texts, errors):
+        self._context = context
+        self._delays = delays
+        self._texts = texts
+        self._errors = errors
+        self.url = ""
+        self.closed = False
+
+    async def goto(self, url, wait_until=None):
+        self.url = url
+        self._context.in_flight += 1
+        self._context.max_in_flight = max(self._context.max_in_flight, self._context.in_flight)
+        try:
+            await asyncio.sleep(self._delays.get(url, 0))
+        finally:
+            self._context.in_flight -= 1
+        if url in self._errors:
+            raise self._errors[url]
+
+    async def title(self):
+        return f"Title of {self.url}"
+
+    async def evaluate(self, script):
+        return self._texts.get(self.url, "some   page\ntext")
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, delays=None, texts=None, errors=None):
+        self.delays = delays or {}
+        self.texts = texts or {}
+        self.errors = errors or {}
+        self.pages = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def new_page(self):
+        page = FakePage(self, self.delays, self.texts, self.errors)
+        self.pages.append(page)
+        return page
+
+
+def test_normalize_urls_dedupes_in_order_and_limits(monkeypatch):
+    monkeypatch.setattr(parallel_browse, "BROWSE_URLS_MAX_URLS", 3)
+    urls, skipped = normalize_urls([" https://b ", "https://a", "https://b", "", "https://c", "https://d"])
+    assert urls == ["https://b", "https://a", "https://c"]
+    assert skipped == ["https://d"]
+    assert clamp_tabs(0) == 1
+    assert clamp_tabs(500) == parallel_browse.BROWSE_URLS_MAX_TABS
+
+
+def test_tabs_are_bounded_and_closed():
+    context = FakeContext(delays={f"https://site/{i}": 0.01 for i in range(6)})
+    summary = asyncio.run(browse_urls_in_context(context, [f"https://site/{i}" for i in range(6)], max_tabs=2))
+
+    assert context.max_in_flight == 2
+    assert all(page.closed for page in context.pages)
+    assert summary.startswith("Browsed 6 URLs")
+    assert "6 succeeded, 0 failed" in summary
+    assert "Text: some page text" in summary
+
+
+def test_timed_out_and_failed_urls_are_reported_individually(monkeypatch):
+    monkeypatch.setattr(parallel_browse, "BROWSE_URLS_BATCH_TIMEOUT_SECONDS", 0.05)
+    error = RuntimeError("net::ERR_NAME_NOT_RESOLVED at https://broken\nCall log:\n  - navigating to \"https://broken\"")
+    context = FakeContext(delays={"https://slow": 5}, errors={"https://broken": error})
+
+    summary = asyncio.run(browse_urls_in_context(context, ["https://fast", "https://slow", "https://broken"]))
+    lines = summary.splitlines()
+
+    assert "1 succeeded, 2 failed" in lines[0]
+    assert lines[1].startswith("[1] https://fast")
+    assert lines[2].startswith("[2] https://slow") and "timed out" in lines[2]
+    assert lines[3].endswith("FAILED: net::ERR_NAME_NOT_RESOLVED at https://broken")
+    assert "Call log" not in summary
+    assert all(page.closed for page in context.pages)
+
+
+def test_summary_is_size_capped(monkeypatch):
+    monkeypatch.setattr(parallel_browse, "BROWSE_URLS_MAX_TOTAL_CHARS", 1000)
+    monkeypatch.setattr(parallel_browse, "BROWSE_URLS_MAX_OUTPUT_CHARS", 1500)
+    urls = [f"https://site/{i}" for i in range(4)]
+    context = FakeContext(texts={url: "x" * 5000 for url in urls})
+
+    summary = asyncio.run(browse_urls_in_context(context, urls))
+
+    assert len(summary) <= 1500
+    # Text budget split evenly: 250 chars per page
+    assert summary.count("x" * 247 + "...") == 4
+    assert "x" * 251 not in summary
+
+    errors = {f"https://bad/{i}": RuntimeError("boom " * 500) for i in range(20)}
+    summary = asyncio.run(browse_urls_in_context(FakeContext(errors=errors), list(errors)))
+    assert len(summary) <= 1500
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import sys
+import time
+import types
+
+import pytest
+
+pytest.importorskip("playwright")
+pytest.importorskip("cryptography")
+from cryptography.fernet import Fernet  # noqa: E402
+
+# The server imports these modules as src.playwright.*; map that package onto src/agent/playwright.
+_PLAYWRIGHT_DIR = os.path.join(os.path.dirname(__file__), "..", "src", "agent", "playwright")
+_src = sys.modules.setdefault("src", types.ModuleType("src"))
+_src_playwright = types.ModuleType("src.playwright")
+_src_playwright.__path__ = [_PLAYWRIGHT_DIR]
+sys.modules.setdefault("src.playwright", _src_playwright)
+
+from src.playwright.playwright_manager import PlaywrightManager  # noqa: E402
+from src.playwright.storage_state_store import StorageStateStore  # noqa: E402
+
+
+def _cookie(name: str, value: str, domain: str = ".example.com") -> dict:
+    return {"name": name, "value": value, "domain": domain, "path": "/", "expires": -1}
+
+
+class FakeLocator:
+    def __init__(self, page):
+        self._page = page
+
+    async def count(self):
+        return self._page.password_fields
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.url = "about:blank"
+        self.password_fields = 0
+        self._closed = False
+
+    def is_closed(self):
+        return self._closed
+
+    def locator(self, selector):
+        return FakeLocator(self)
+
+
+class FakeContext:
+    def __init__(self, storage_state=None):
+        self.loaded_state = storage_state
+        self.final_state = storage_state or {"cookies": [], "origins": []}
+        self.storage_state_error = None
+        self.closed = False
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def storage_state(self):
+        if self.storage_state_error:
+            raise self.storage_state_error
+        return self.final_state
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, viewport=None, storage_state=None):
+        context = FakeContext(storage_state)
+        self.contexts.append(context)
+        return context
+
+    async def new_page(self, viewport=None):
+        return FakePage(None)
+
+
+class CountingStore(StorageStateStore):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.invalidations = 0
+
+    async def invalidate(self, name):
+        self.invalidations += 1
+        await super().invalidate(name)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CountingStore(str(tmp_path), Fernet.generate_key())
+
+
+@pytest.fixture
+def manager(store):
+    PlaywrightManager._instance = None
+    manager = asyncio.run(PlaywrightManager.get_instance())
+    manager._browser = FakeBrowser()
+    manager.set_storage_state_store(store)
+    yield manager
+    PlaywrightManager._instance = None
+
+
+def _seed(store, *cookies):
+    asyncio.run(store.save("crm", {"cookies": list(cookies), "origins": []}))
+
+
+def test_profile_is_loaded_into_task_context_and_saved_back(manager, store):
+    _seed(store, _cookie("sid", "1"))
+
+    async def run():
+        async with manager.task_context("crm") as task:
+            assert task.context.loaded_state["cookies"][0]["value"] == "1"
+            assert await manager.get_page() is task.page
+            task.context.final_state = {"cookies": [_cookie("sid", "2")], "origins": []}
+        return task
+
+    task = asyncio.run(run())
+    assert task.context.closed
+    assert asyncio.run(store.load("crm"))["cookies"][0]["value"] == "2"
+
+
+def test_without_profile_the_shared_page_is_used(manager):
+    async def run():
+        async with manager.task_context(None) as task:
+            assert task is None
+            assert manager.get_task_context() is None
+
+    asyncio.run(run())
+    assert manager._browser.contexts == []
+
+
+def test_save_failure_does_not_hide_task_result_or_error(manager, store):
+    _seed(store, _cookie("sid", "1"))
+
+    async def run(fail_task: bool):
+        async with manager.task_context("crm") as task:
+            task.context.storage_state_error = RuntimeError("browser has been closed")
+            if fail_task:
+                raise ValueError("agent failed")
+        return "answer"
+
+    assert asyncio.run(run(False)) == "answer"
+    with pytest.raises(ValueError, match="agent failed"):
+        asyncio.run(run(True))
+    assert all(context.closed for context in manager._browser.contexts)
+    assert asyncio.run(store.load("crm"))["cookies"][0]["value"] == "1"
+
+
+def test_task_ending_on_login_page_is_not_saved(manager, store):
+    _seed(store, _cookie("sid", "1"))
+
+    async def run():
+        async with manager.task_context("crm") as task:
+            task.page.url = "https://app.example.com/dashboard"
+            task.page.password_fields = 1
+            task.context.final_state = {"cookies": [], "origins": []}
+
+    asyncio.run(run())
+    assert asyncio.run(store.load("crm"))["cookies"][0]["value"] == "1"
+
+
+def test_login_wall_only_invalidates_once_and_only_for_covered_sites(manager, store):
+    _seed(store, _cookie("sid", "1"))
+
+    async def run():
+        async with manager.task_context("crm") as task:
+            other = await task.context.new_page()
+            other.url = "https://accounts.google.com/signin"
+            assert await manager.check_login_wall(other)
+            assert store.invalidations == 0
+
+            loaded_at = task.loaded_at
+            await asyncio.sleep(0.01)
+            task.page.url = "https://app.example.com/login"
+            assert await manager.check_login_wall(task.page)
+            assert store.invalidations == 1
+            assert task.loaded_at > loaded_at
+            assert await store.load("crm") is None
+
+            assert await manager.check_login_wall(task.page)
+            assert store.invalidations == 1
+
+            # The agent logs in again; the fresh session is saved at the end
+            task.page.url = "https://app.example.com/dashboard"
+            task.context.final_state = {"cookies": [_cookie("sid", "fresh")], "origins": []}
+
+    asyncio.run(run())
+    assert asyncio.run(store.load("crm"))["cookies"][0]["value"] == "fresh"
+
+
+def test_disconnected_browser_is_relaunched(manager, store):
+    dead = manager._browser
+    dead.connected = False
+    fresh = FakeBrowser()
+
+    async def launch(headless=True):
+        return fresh
+
+    manager._playwright_context = types.SimpleNamespace(chromium=types.SimpleNamespace(launch=launch))
+
+    async def run():
+        async with manager.task_context("crm"):
+            pass
+
+    asyncio.run(run())
+    assert manager._browser is fresh
+    assert dead.contexts == [] and len(fresh.contexts) == 1
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("cryptography")
+from cryptography.fernet import Fernet  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "agent", "playwright"))
+
+from storage_state_store import (  # noqa: E402
+    StorageStateStore,
+    is_valid_profile_name,
+    merge_storage_states,
+    storage_state_covers_url,
+)
+
+
+def _cookie(name: str, value: str, domain: str = ".example.com", expires: float = -1) -> dict:
+    return {"name": name, "value": value, "domain": domain, "path": "/", "expires": expires}
+
+
+def _state(*cookies, origins=None) -> dict:
+    return {"cookies": list(cookies), "origins": origins or []}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StorageStateStore(str(tmp_path), Fernet.generate_key())
+
+
+def test_round_trip_is_encrypted_at_rest(store, tmp_path):
+    state = _state(_cookie("sid", "secret-session"), origins=[{"origin": "https://example.com", "localStorage": []}])
+
+    assert asyncio.run(store.save("crm", state))
+    raw = (tmp_path / "crm.state").read_bytes()
+    assert b"secret-session" not in raw
+    assert asyncio.run(store.load("crm")) == state
+
+
+def test_expired_profile_is_discarded(tmp_path):
+    store = StorageStateStore(str(tmp_path), Fernet.generate_key(), ttl_seconds=0)
+    asyncio.run(store.save("crm", _state(_cookie("sid", "1"))))
+    time.sleep(0.01)
+
+    assert asyncio.run(store.load("crm")) is None
+    assert not (tmp_path / "crm.state").exists()
+
+
+def test_expired_cookies_are_dropped_on_load(store):
+    state = _state(
+        _cookie("session", "1"),
+        _cookie("fresh", "2", expires=time.time() + 3600),
+        _cookie("stale", "3", expires=time.time() - 3600),
+    )
+    asyncio.run(store.save("crm", state))
+
+    names = {c["name"] for c in asyncio.run(store.load("crm"))["cookies"]}
+    assert names == {"session", "fresh"}
+
+
+@pytest.mark.parametrize("contents", [b"not a fernet token", None])
+def test_unreadable_profile_is_discarded(store, tmp_path, contents):
+    if contents is None:
+        # Valid token written with a different key
+        other = StorageStateStore(str(tmp_path), Fernet.generate_key())
+        asyncio.run(other.save("crm", _state(_cookie("sid", "1"))))
+    else:
+        (tmp_path / "crm.state").write_bytes(contents)
+
+    assert asyncio.run(store.load("crm")) is None
+    assert not (tmp_path / "crm.state").exists()
+
+
+def test_merge_by_cookie_key_and_origin():
+    base = _state(
+        _cookie("sid", "old"),
+        _cookie("sid", "other-domain", domain="other.com"),
+        origins=[{"origin": "https://a.com", "localStorage": [{"name": "k", "value": "old"}]}],
+    )
+    update = _state(
+        _cookie("sid", "new"),
+        _cookie("sid", "other-domain", domain="other.com"),
+        origins=[
+            {"origin": "https://a.com", "localStorage": [{"name": "k", "value": "new"}]},
+            {"origin": "https://b.com", "localStorage": []},
+        ],
+    )
+
+    merged = merge_storage_states(base, base, update)
+    cookies = {(c["name"], c["domain"]): c["value"] for c in merged["cookies"]}
+    origins = {o["origin"]: o["localStorage"] for o in merged["origins"]}
+    assert cookies == {("sid", ".example.com"): "new", ("sid", "other.com"): "other-domain"}
+    assert origins["https://a.com"] == [{"name": "k", "value": "new"}]
+    assert set(origins) == {"https://a.com", "https://b.com"}
+
+
+def test_merge_drops_removed_entries_and_keeps_other_writers_additions():
+    base = _state(_cookie("sid", "1"), origins=[{"origin": "https://a.com", "localStorage": []}])
+    # Another context saved a new cookie and origin since this one loaded the profile
+    current = _state(
+        _cookie("sid", "1"),
+        _cookie("pref", "dark"),
+        origins=[{"origin": "https://a.com", "localStorage": []}, {"origin": "https://b.com", "localStorage": []}],
+    )
+    # This context logged out: its session cookie and a.com storage are gone
+    update = _state()
+
+    merged = merge_storage_states(current, base, update)
+    assert [c["name"] for c in merged["cookies"]] == ["pref"]
+    assert [o["origin"] for o in merged["origins"]] == ["https://b.com"]
+
+
+def test_logout_is_persisted(store):
+    asyncio.run(store.save("crm", _state(_cookie("sid", "1"))))
+    loaded = asyncio.run(store.load("crm"))
+
+    asyncio.run(store.save("crm", _state(), base_state=loaded))
+    assert asyncio.run(store.load("crm"))["cookies"] == []
+
+
+def test_ttl_counts_from_creation_not_last_save(tmp_path, monkeypatch):
+    store = StorageStateStore(str(tmp_path), Fernet.generate_key(), ttl_seconds=100)
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+
+    asyncio.run(store.save("crm", _state(_cookie("sid", "1"))))
+    now[0] += 60
+    loaded = asyncio.run(store.load("crm"))
+    asyncio.run(store.save("crm", loaded, base_state=loaded))
+    now[0] += 60
+
+    assert asyncio.run(store.load("crm")) is None
+
+
+def test_save_from_context_loaded_before_invalidation_is_skipped(store):
+    asyncio.run(store.save("crm", _state(_cookie("sid", "1"))))
+    loaded_at = time.time() - 10
+    asyncio.run(store.invalidate("crm"))
+
+    assert asyncio.run(store.save("crm", _state(_cookie("sid", "stale")), loaded_at=loaded_at)) is False
+    assert asyncio.run(store.load("crm")) is None
+    assert asyncio.run(store.save("crm", _state(_cookie("sid", "fresh")), loaded_at=time.time() + 1))
+    assert asyncio.run(store.load("crm"))["cookies"][0]["value"] == "fresh"
+
+
+def test_storage_state_covers_url():
+    state = _state(_cookie("sid", "1", domain=".example.com"), origins=[{"origin": "https://app.other.com", "localStorage": []}])
+
+    assert storage_state_covers_url(state, "https://login.example.com/signin")
+    assert storage_state_covers_url(state, "https://app.other.com/login")
+    assert not storage_state_covers_url(state, "https://accounts.google.com/signin")
+    assert not storage_state_covers_url(state, "https://notexample.com/login")
+    assert not storage_state_covers_url(None, "https://example.com/login")
+
+
+def test_profile_names_are_validated():
+    assert is_valid_profile_name("crm-prod_1.v2")
+    assert not is_valid_profile_name("../etc/passwd")
+    assert not is_valid_profile_name(123)
+    assert not is_valid_profile_name("")